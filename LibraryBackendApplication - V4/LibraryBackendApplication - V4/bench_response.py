@@ -0,0 +1,82 @@
+import json
+import random
+import sys
+import time
+
+from bson import ObjectId
+
+import response_utils
+from response_utils import compress, dumps
+
+GENRES = ["Fiction", "Mystery", "History", "Biography", "Science", "Romance", "Fantasy"]
+WORDS = "the a library book story of and life war night lost city island history secret".split()
+
+
+def make_catalogue(n):
+    """Synthetic /get-books payload shaped like the inventory projection"""
+    rng = random.Random(892)
+    return [{
+        "_id": ObjectId(),
+        "name": f"{' '.join(rng.choices(WORDS, k=3)).title()} {i}",
+        "author": f"Author {rng.randint(1, n // 10 + 1)}",
+        "genre": rng.choice(GENRES),
+        "description": " ".join(rng.choices(WORDS, k=40)),
+        "image": f"book_{i}.jpg",
+        "rating": round(rng.uniform(1, 5), 1)
+    } for i in range(n)]
+
+
+def before(books):
+    # What get_books did: copy with str(_id) in a loop, then the stdlib encoder via jsonify
+    for book in books:
+        book["_id"] = str(book["_id"])
+    return json.dumps(books).encode("utf-8")
+
+
+def after(books):
+    return dumps(books)
+
+
+def best_of(fn, make_input, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        data = make_input()
+        start = time.perf_counter()
+        body = fn(data)
+        timings.append(time.perf_counter() - start)
+    return min(timings), body
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000]
+    encoder = "orjson" if response_utils.orjson is not None else "json"
+    print(f"encoder={encoder} brotli={'yes' if response_utils.brotli is not None else 'no'}")
+    print(f"{'books':>7} {'before ms':>10} {'after ms':>9} {'raw KB':>9} {'gzip KB':>8} {'br KB':>8} {'gzip ms':>8} {'br ms':>7} {'cached µs':>10}")
+
+    for n in sizes:
+        catalogue = make_catalogue(n)
+        fresh = lambda: [dict(b) for b in catalogue]
+        before_s, _ = best_of(before, fresh)
+        after_s, body = best_of(after, fresh)
+
+        start = time.perf_counter()
+        gz, _ = compress(body, "gzip")
+        gzip_s = time.perf_counter() - start
+
+        br, br_s = body, 0.0
+        if response_utils.brotli is not None:
+            start = time.perf_counter()
+            br, _ = compress(body, "br")
+            br_s = time.perf_counter() - start
+
+        # What /get-books pays while the catalogue version is unchanged
+        cache = response_utils.ResponseCache()
+        cache.encode("books", 1, lambda: catalogue, "gzip")
+        start = time.perf_counter()
+        for _ in range(1000):
+            cache.encode("books", 1, lambda: catalogue, "gzip")
+        cached_s = (time.perf_counter() - start) / 1000
+
+        print(f"{n:>7} {before_s * 1000:>10.1f} {after_s * 1000:>9.1f} {len(body) / 1024:>9.0f} "
+              f"{len(gz) / 1024:>8.0f} {len(br) / 1024:>8.0f} {gzip_s * 1000:>8.1f} {br_s * 1000:>7.1f} "
+              f"{cached_s * 1e6:>10.1f}")
@@ -0,0 +1,84 @@
+import gc
+import random
+import sys
+import time
+import tracemalloc
+
+from bson import ObjectId
+
+from catalogue_snapshot import BookRecord, CatalogueSnapshot
+
+GENRES = ["Fiction", "Mystery", "History", "Biography", "Science", "Romance", "Fantasy"]
+WORDS = "the a library book story of and life war night lost city island history secret".split()
+
+
+class InMemoryInventory:
+    """Just enough of a collection for CatalogueSnapshot.reload"""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self):
+        return iter(self.docs)
+
+
+def make_inventory(n):
+    rng = random.Random(892)
+    return [{
+        "_id": ObjectId(),
+        "name": f"{' '.join(rng.choices(WORDS, k=3)).title()} {i}",
+        "author": f"Author {rng.randint(1, n // 10 + 1)}",
+        "genre": rng.choice(GENRES),
+        "description": " ".join(rng.choices(WORDS, k=40)),
+        "cover_filename": f"book_{i}.jpg",
+        "rating": round(rng.uniform(1, 5), 1),
+        "average_rating": round(rng.uniform(1, 5), 2)
+    } for i in range(n)]
+
+
+def measure(build):
+    """Bytes allocated by build() that are still alive afterwards"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, size
+
+
+def per_call(fn, args):
+    start = time.perf_counter()
+    for arg in args:
+        fn(arg)
+    return (time.perf_counter() - start) / len(args)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    inventory = make_inventory(n)
+
+    # Strings are shared by both layouts, so compare the containers each one adds
+    docs, dict_bytes = measure(lambda: [dict(doc) for doc in inventory])
+    records, record_bytes = measure(lambda: [BookRecord(doc) for doc in inventory])
+    del records
+    snapshot = CatalogueSnapshot(InMemoryInventory(inventory))
+    _, snapshot_bytes = measure(snapshot.reload)
+
+    rng = random.Random(7)
+    names = [rng.choice(inventory)["name"] for _ in range(10000)]
+    ids = [rng.choice(inventory)["_id"] for _ in range(10000)]
+
+    print(f"titles: {n}")
+    print(f"memory per book: dict document {dict_bytes / n:.0f} B, BookRecord {record_bytes / n:.0f} B, "
+          f"snapshot with indexes {snapshot_bytes / n:.0f} B")
+    print(f"by_name:   {per_call(snapshot.by_name, names) * 1e6:.2f} us")
+    print(f"by_id:     {per_call(snapshot.by_id, ids) * 1e6:.2f} us")
+    print(f"scan name: {per_call(lambda name: next(d for d in docs if d['name'] == name), names[:20]) * 1e3:.2f} ms (list of dicts)")
+
+    projection = {"_id": 1, "name": 1, "author": 1, "genre": 1, "cover_filename": 1, "rating": 1}
+    start = time.perf_counter()
+    snapshot.documents(projection)
+    print(f"documents(projection): {(time.perf_counter() - start) * 1e3:.0f} ms first call, "
+          f"{per_call(lambda _: snapshot.documents(projection), range(1000)) * 1e6:.2f} us cached")
@@ -1,16 +1,13 @@
 # import json
 import uvicorn
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from pydantic import BaseModel
 from typing import List, Optional
-import Book_DB_CRUD
-import User_DB_CRUD
-
-from Book_DB_CRUD import initialize as init_db
-from User_DB_CRUD import get_users, find_user, create_user
-
-users_collection, books_collection, borrowed_books_collection = init_db()
+import library_service
+from response_utils import encode_json, response_cache
+from recommendation_gate import RecommendationGate
 
 # class User(BaseModel):
 #     username: str
@@ -57,25 +54,35 @@ app.add_middleware(
 )
 
 memory_db = {"borrowed_books": []}
-users_collection, books_collection, borrowed_books_collection = Book_DB_CRUD.initialize()
+db = library_service.initialize()
+
+print("Library Database:", db)
+
+recommendation_gate = RecommendationGate.from_env()
+
+def json_response(request: Request, data, status_code: int = 200):
+    # Bypasses jsonable_encoder: the fast encoder handles ObjectId/datetime and compression
+    body, headers = encode_json(data, request.headers.get("accept-encoding"))
+    return Response(content=body, status_code=status_code, headers=headers, media_type="application/json")
 
-print("Users Collection:", users_collection)
-print("Books Collection:", books_collection)
-print("Borrowed Books Collection:", borrowed_books_collection)
+def cached_json_response(request: Request, name: str, key, build):
+    # Reuses the encoded and compressed body until key changes
+    body, headers = response_cache.encode(name, key, build, request.headers.get("accept-encoding"))
+    return Response(content=body, headers=headers, media_type="application/json")
 
 @app.get("/get-users")
-def get_users():
-    users = list(users_collection.find({}, {"_id": 0}))  # Exclude MongoDB's ObjectId
-    return {"users": users}
+def get_users(request: Request):
+    users = library_service.get_users(db, {"_id": 0})  # Exclude MongoDB's ObjectId
+    return json_response(request, {"users": users})
 
 @app.get("/get-books")
-def get_books():
-    books = list(books_collection.find({}, {"_id": 0}))
-    return {"books": books}
+def get_books(request: Request):
+    return cached_json_response(request, "borrow-return:get-books", library_service.catalogue_version(db),
+                                lambda: {"books": library_service.get_books(db, {"_id": 0})})
 
 @app.get("/get-user/{username}")
 def get_user(username: str):
-    user = users_collection.find_one({"username": username}, {"_id": 0})
+    user, _ = library_service.find_user(db, username, {"_id": 0}, include_admins=False)
     if user:
         return user
     # return {"message": "User not found"}
@@ -83,7 +90,7 @@ def get_user(username: str):
 
 @app.get("/get-book/{book_name}")
 def get_book(book_name: str):
-    book = books_collection.find_one({"name": book_name}, {"_id": 0})
+    book = library_service.find_book(db, book_name, {"_id": 0})
     if book:
         return book
     # return {"message": "Book not found"}
@@ -91,36 +98,32 @@ def get_book(book_name: str):
 
 @app.post("/return-book")
 def return_book(request: ReturnRequest):
-    result = Book_DB_CRUD.return_book(users_collection, books_collection, borrowed_books_collection, request.username, request.book_name)
+    result = library_service.return_book(db, request.username, request.book_name)
     return {"message": result}
 
 @app.post("/borrow-book")
 def borrow_book(request: BorrowRequest):
-    result = Book_DB_CRUD.borrow_book(users_collection, books_collection, borrowed_books_collection, request.username, request.book_name)
+    result = library_service.borrow_book(db, request.username, request.book_name)
     return {"message": result}
 
 @app.get("/recommendations/{username}")
 def get_recommendations(username: str):
-    # user = users_collection.find_one({"username": username}, {"_id": 0})
-    # if user:
-    #     return {"message": "User found"}
-    # raise HTTPException(status_code=404, detail="User not found")
+    user, _ = library_service.find_user(db, username, {"_id": 1}, include_admins=False)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
     try:
-        user = get_user(username)
-        user_recommendations = Book_DB_CRUD.get_recommendations(username, users_collection, books_collection)
-        return user_recommendations
-    except HTTPException as e:
-        raise e
+        return recommendation_gate.recommend(db, username)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/login-user")
 def login(login_user: LoginUser):
-    users = User_DB_CRUD.get_users(users_collection)
-    user_exists = any(user['username'] == login_user.username for user in users)
-    if user_exists:
-        for user in users:
-            if (user["username"] == login_user.username) and (user["password"] == login_user.password):
-                return {"username": login_user.username,
-                        "message": "Login successful"}
+    # Single indexed lookup instead of scanning every user
+    user, _ = library_service.find_user(db, login_user.username, {"password": 1}, include_admins=False)
+    if user:
+        if user.get("password") == login_user.password:
+            return {"username": login_user.username,
+                    "message": "Login successful"}
         # return {"message": "Login failed"}
         raise HTTPException(status_code=404, detail="Login Failed")
     else:
@@ -130,50 +133,24 @@ def login(login_user: LoginUser):
 @app.post("/create-user")
 @app.post("/register-user")
 def register(register_user: RegisterUser):
-    new_user = User_DB_CRUD.create_user(users_collection, register_user.username, register_user.password)
+    new_user = library_service.create_user(db, register_user.username, register_user.password)
     return {"message": "User created", "id": new_user, "username": register_user.username}
 
-@app.get("/get-user/{username}")
-async def get_user_books(username: str):
-    user = users_collection.find_one({"username": username})
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return user
-
 @app.get("/get-popular-books")
-async def get_popular_books():
-    popular_books = list(books_collection.find().sort("average_rating", -1).limit(5))
+def get_popular_books():
+    popular_books = library_service.get_popular_books(db, 5)
     return [{"name": b["name"], "author": b.get("author", "Unknown")} for b in popular_books]
 
-@app.get("/recommendations/{username}")
-async def get_user_recommendations(username: str):
-    try:
-        recommendations = Book_DB_CRUD.get_recommendations(
-            username, 
-            users_collection, 
-            books_collection
-        )
-        return recommendations
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    
+@app.get("/recommendation-stats")
+def get_recommendation_stats():
+    return recommendation_gate.stats()
+
 @app.get("/get-books-with-status")
-def get_books_with_status():
-    books = list(books_collection.find({}, {"_id": 0}))
-    borrowed_books = list(borrowed_books_collection.find({}, {"_id": 0, "book_name": 1, "userID": 1}))
-    
-    # Create a map of borrowed books
-    borrowed_map = {b["book_name"]: b["userID"] for b in borrowed_books}
-    
-    # Mark books as borrowed if they're in the borrowed collection
-    for book in books:
-        if book["name"] in borrowed_map:
-            book["borrowed"] = True
-            book["borrowedBy"] = borrowed_map[book["name"]]
-        else:
-            book["borrowed"] = False
-    
-    return {"books": books}
+def get_books_with_status(request: Request):
+    loans = library_service.get_loans(db)
+    key = (library_service.catalogue_version(db), frozenset(loans.items()))
+    return cached_json_response(request, "borrow-return:get-books-with-status", key,
+                                lambda: {"books": library_service.get_books_with_status(db, {"_id": 0}, include_borrower=True, loans=loans)})
 
 if __name__ == "__main__":
     uvicorn.run(app, host="127.0.0.1", port=8000)
\ No newline at end of file
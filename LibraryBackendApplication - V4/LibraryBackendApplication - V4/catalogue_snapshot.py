@@ -0,0 +1,242 @@
+import os
+import threading
+
+from dotenv import load_dotenv, find_dotenv
+
+# Marks a field the inventory document does not have, so projections can omit it like MongoDB does
+MISSING = object()
+
+
+class BookRecord:
+    """Compact inventory entry; fields outside the usual schema are kept in extra"""
+
+    __slots__ = ("_id", "name", "author", "genre", "description", "image",
+                 "cover_filename", "rating", "average_rating", "extra")
+
+    FIELDS = __slots__[:-1]
+    FIELD_SET = frozenset(FIELDS)
+
+    def __init__(self, doc):
+        for field in self.FIELDS:
+            setattr(self, field, doc.get(field, MISSING))
+        extra = {k: v for k, v in doc.items() if k not in self.FIELD_SET}
+        self.extra = extra or None
+
+    def same_as(self, other):
+        return all(getattr(self, f) == getattr(other, f) for f in self.__slots__)
+
+    def get(self, field, default=None):
+        if field in self.FIELD_SET:
+            value = getattr(self, field)
+            return default if value is MISSING else value
+        if self.extra:
+            return self.extra.get(field, default)
+        return default
+
+    def to_dict(self, fields=None, exclude=()):
+        """Fresh document with the requested fields, or every field not excluded"""
+        doc = {}
+        if fields is not None:
+            for field in fields:
+                if field in self.FIELD_SET:
+                    value = getattr(self, field)
+                elif self.extra:
+                    value = self.extra.get(field, MISSING)
+                else:
+                    continue
+                if value is not MISSING:
+                    doc[field] = value
+            return doc
+
+        for field in self.FIELDS:
+            value = getattr(self, field)
+            if value is not MISSING and field not in exclude:
+                doc[field] = value
+        if self.extra:
+            doc.update((k, v) for k, v in self.extra.items() if k not in exclude)
+        return doc
+
+
+def parse_projection(projection):
+    """Split a MongoDB projection into (fields, exclude) arguments for BookRecord.to_dict"""
+    if not projection:
+        return None, ()
+    included = [f for f, v in projection.items() if v and f != "_id"]
+    # {"_id": 1} alone is an inclusion projection too: MongoDB returns only _id
+    if included or all(projection.values()):
+        return (["_id"] if projection.get("_id", 1) else []) + included, ()
+    return None, {f for f, v in projection.items() if not v}
+
+
+class CatalogueSnapshot:
+    """In-process copy of the inventory collection, indexed by _id and by name.
+
+    Loaded once, then kept current from a MongoDB change stream. Deployments
+    without change streams (standalone servers, local stand-ins) fall back to
+    reloading every poll_interval seconds. version changes only when the
+    content does, so derived data (popular list, TF-IDF matrix) can be cached
+    against it.
+    """
+
+    def __init__(self, collection, poll_interval=30.0):
+        self.collection = collection
+        self.poll_interval = poll_interval
+        self.version = 0
+        self._lock = threading.Lock()
+        self._by_id = {}
+        # name -> tuple of records; titles aren't unique, and by_name returns the first loaded
+        self._by_name = {}
+        self._ordered = None
+        self._documents = {}
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_env(cls, collection):
+        load_dotenv(find_dotenv())
+        return cls(collection, poll_interval=float(os.environ.get("CATALOGUE_POLL_SECONDS", 30.0)))
+
+    # Loading and updates
+
+    def reload(self):
+        # Build the new indexes off to the side; by_name/by_id read without the lock
+        by_id, by_name = {}, {}
+        for doc in self.collection.find():
+            record = BookRecord(doc)
+            by_id[record._id] = record
+            by_name[record.name] = by_name.get(record.name, ()) + (record,)
+
+        with self._lock:
+            unchanged = len(by_id) == len(self._by_id) and all(
+                (old := self._by_id.get(book_id)) is not None and old.same_as(record)
+                for book_id, record in by_id.items()
+            )
+            if unchanged:
+                return
+            self._by_id, self._by_name = by_id, by_name
+            self._changed()
+
+    def _changed(self):
+        self._ordered = None
+        self.version += 1
+
+    def _replace(self, book_id, record):
+        """Swap one entry (record None deletes it); the new entry goes in before the old comes out"""
+        old = self._by_id.get(book_id)
+        if old is None and record is None:
+            return
+        if old is not None and record is not None and old.same_as(record):
+            return
+
+        if record is not None:
+            self._by_id[book_id] = record
+            self._by_name[record.name] = self._by_name.get(record.name, ()) + (record,)
+        else:
+            del self._by_id[book_id]
+
+        if old is not None:
+            # Buckets are replaced, never mutated, so lock-free readers see a whole one;
+            # another title with the same name takes over when this one goes
+            survivors = tuple(r for r in self._by_name.get(old.name, ()) if r is not old)
+            if survivors:
+                self._by_name[old.name] = survivors
+            else:
+                self._by_name.pop(old.name, None)
+        self._changed()
+
+    def apply_change(self, change):
+        """Apply one change stream event; returns False when a full reload is needed"""
+        operation = change.get("operationType")
+        if operation in ("insert", "replace", "update"):
+            doc = change.get("fullDocument")
+            with self._lock:
+                self._replace(change["documentKey"]["_id"], BookRecord(doc) if doc is not None else None)
+            return True
+        if operation == "delete":
+            with self._lock:
+                self._replace(change["documentKey"]["_id"], None)
+            return True
+        return False
+
+    def _open_stream(self):
+        try:
+            return self.collection.watch(full_document="updateLookup")
+        except Exception as e:
+            # Standalone servers raise OperationFailure; local stand-ins raise whatever they like
+            print(f"Catalogue change stream unavailable ({e}), polling every {self.poll_interval}s")
+            return None
+
+    def start(self):
+        # Open the stream before loading so no change falls between the two
+        stream = self._open_stream()
+        self.reload()
+        self._thread = threading.Thread(target=self._follow, args=(stream,), name="catalogue-snapshot", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+
+    def _follow(self, stream):
+        while stream is not None and not self._stopped.is_set():
+            try:
+                with stream:
+                    for change in stream:
+                        if self._stopped.is_set():
+                            return
+                        if not self.apply_change(change):
+                            break
+            except Exception as e:
+                # Anything escaping here would end the thread and freeze the snapshot
+                print(f"Catalogue change stream interrupted: {str(e)}")
+                self._stopped.wait(1)
+
+            # Dropped, renamed or interrupted: resubscribe and resync from scratch
+            stream = self._open_stream()
+            try:
+                self.reload()
+            except Exception as e:
+                print(f"Error reloading catalogue snapshot: {str(e)}")
+
+        while not self._stopped.wait(self.poll_interval):
+            try:
+                self.reload()
+            except Exception as e:
+                print(f"Error reloading catalogue snapshot: {str(e)}")
+
+    # Reads
+
+    def records(self):
+        """All records as a tuple, stable for the caller even while updates arrive"""
+        return self.view()[1]
+
+    def view(self):
+        """(version, records) read together so caches can key derived data on version"""
+        with self._lock:
+            if self._ordered is None:
+                self._ordered = tuple(self._by_id.values())
+            return self.version, self._ordered
+
+    def by_name(self, name):
+        bucket = self._by_name.get(name)
+        return bucket[0] if bucket else None
+
+    def by_id(self, book_id):
+        return self._by_id.get(book_id)
+
+    def documents(self, projection=None):
+        """The catalogue as documents shaped by a MongoDB projection.
+
+        Built once per version and projection and shared by every caller, so
+        neither the list nor its documents may be modified.
+        """
+        key = tuple(sorted(projection.items())) if projection else None
+        version, records = self.view()
+        cached = self._documents.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        fields, exclude = parse_projection(projection)
+        documents = [record.to_dict(fields, exclude) for record in records]
+        self._documents[key] = (version, documents)
+        return documents
@@ -0,0 +1,50 @@
+import pytest
+
+from catalogue_snapshot import CatalogueSnapshot
+
+
+class InMemoryInventory:
+    """Just enough of the inventory collection for the snapshot and library_service lookups"""
+
+    def __init__(self, docs=()):
+        self.docs = [dict(doc) for doc in docs]
+        self.queries = []
+
+    def _matches(self, doc, query):
+        for field, condition in (query or {}).items():
+            if isinstance(condition, dict) and "$in" in condition:
+                if doc.get(field) not in condition["$in"]:
+                    return False
+            elif doc.get(field) != condition:
+                return False
+        return True
+
+    def find(self, query=None, projection=None):
+        self.queries.append(query)
+        return iter([dict(doc) for doc in self.docs if self._matches(doc, query)])
+
+    def find_one(self, query=None, projection=None):
+        self.queries.append(query)
+        return next((dict(doc) for doc in self.docs if self._matches(doc, query)), None)
+
+
+class FakeDB:
+    def __init__(self, docs=()):
+        self.inventory = InMemoryInventory(docs)
+
+
+@pytest.fixture
+def catalogue_db(monkeypatch):
+    """library_service wired to an in-memory inventory; returns a factory taking the documents"""
+    import library_service
+
+    def make(docs):
+        db = FakeDB(docs)
+        snapshot = CatalogueSnapshot(db.inventory)
+        snapshot.reload()
+        monkeypatch.setattr(library_service, "_catalogue", snapshot)
+        monkeypatch.setattr(library_service, "_popular_cache", (None, []))
+        db.inventory.queries.clear()
+        return db
+
+    return make
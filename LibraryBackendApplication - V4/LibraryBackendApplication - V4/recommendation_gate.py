@@ -0,0 +1,121 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from dotenv import load_dotenv, find_dotenv
+
+import library_service
+
+
+class RecommendationGate:
+    """Bounded executor for recommendation work with load shedding.
+
+    At most max_workers TF-IDF refits run at once and at most max_queue more
+    wait for a worker. Requests beyond that are shed, and requests that miss
+    their deadline are degraded; both are answered with the cached popular
+    list so cheap endpoints in the same process keep their threads.
+    """
+
+    def __init__(self, max_workers=2, max_queue=4, deadline=2.0, fallback_ttl=60.0):
+        self.deadline = deadline
+        self.fallback_ttl = fallback_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="recommend")
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._fallback_cache = {}
+        self._avg_runtime = 0.0
+        self.counters = {"admitted": 0, "completed": 0, "shed": 0, "degraded": 0, "skipped": 0}
+
+    @classmethod
+    def from_env(cls):
+        load_dotenv(find_dotenv())
+        return cls(
+            max_workers=int(os.environ.get("RECOMMEND_MAX_WORKERS", 2)),
+            max_queue=int(os.environ.get("RECOMMEND_MAX_QUEUE", 4)),
+            deadline=float(os.environ.get("RECOMMEND_DEADLINE_SECONDS", 2.0)),
+            fallback_ttl=float(os.environ.get("RECOMMEND_FALLBACK_TTL", 60.0)),
+        )
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters)
+
+    def popular(self, db, n):
+        """Popular list for fallback responses, refreshed at most every fallback_ttl seconds"""
+        with self._lock:
+            cached = self._fallback_cache.get(n)
+        if cached and time.monotonic() - cached[0] < self.fallback_ttl:
+            return cached[1]
+
+        # Single flight: one caller refreshes, the rest keep serving the stale list meanwhile
+        if cached and not self._refresh_lock.acquire(blocking=False):
+            return cached[1]
+        if not cached:
+            self._refresh_lock.acquire()
+        try:
+            with self._lock:
+                cached = self._fallback_cache.get(n)
+            if cached and time.monotonic() - cached[0] < self.fallback_ttl:
+                return cached[1]
+            popular = library_service.get_popular_fallback(db, n)
+            with self._lock:
+                self._fallback_cache[n] = (time.monotonic(), popular)
+            return popular
+        finally:
+            self._refresh_lock.release()
+
+    def _run(self, expires, db, username, n):
+        # Skip the refit if it can't finish before the caller gives up on it
+        start = time.monotonic()
+        if expires - start <= self._avg_runtime:
+            with self._lock:
+                # Decay the estimate so one slow refit can't disable personalisation for good
+                self._avg_runtime *= 0.9
+                self.counters["skipped"] += 1
+            return None
+
+        result = library_service.get_recommendations(db, username, n)
+        elapsed = time.monotonic() - start
+        with self._lock:
+            self._avg_runtime = elapsed if not self._avg_runtime else 0.8 * self._avg_runtime + 0.2 * elapsed
+        return result
+
+    def _release(self, future):
+        self._slots.release()
+
+    def recommend(self, db, username, n=5):
+        """Personalised recommendations, or the popular list when shed or past the deadline"""
+        if not self._slots.acquire(blocking=False):
+            self._count("shed")
+            return self.popular(db, n)
+
+        self._count("admitted")
+        expires = time.monotonic() + self.deadline
+        try:
+            future = self._executor.submit(self._run, expires, db, username, n)
+        except RuntimeError:
+            self._slots.release()
+            raise
+        future.add_done_callback(self._release)
+
+        try:
+            result = future.result(timeout=self.deadline)
+        except FutureTimeoutError:
+            # Still queued work is dropped; running work keeps its slot until it finishes
+            future.cancel()
+            self._count("degraded")
+            return self.popular(db, n)
+
+        # None means skipped; [] means get_recommendations failed and swallowed the error
+        if not result:
+            self._count("degraded")
+            return self.popular(db, n)
+        # Counted here, not in the worker, so a result that lands after the deadline isn't also "completed"
+        self._count("completed")
+        return result
@@ -0,0 +1,145 @@
+import gzip
+import json
+import threading
+from datetime import date, datetime
+
+from bson import ObjectId
+
+# orjson, brotli and numpy are optional; fall back to the standard library when missing
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent as-is, compressing them costs more than it saves
+# Levels favour speed: most responses are compressed per request, only ResponseCache keeps them
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 3
+BROTLI_QUALITY = 4
+
+
+def _default(obj):
+    """Encode the BSON/Python types MongoDB documents carry"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    # numpy scalars (e.g. recommendation similarity scores); np.int64/np.float32 aren't int/float
+    if numpy is not None and isinstance(obj, numpy.generic):
+        return obj.item()
+    # orjson only encodes exact float/int, not subclasses
+    if isinstance(obj, float):
+        return float(obj)
+    if isinstance(obj, int):
+        return int(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(data):
+    """Serialize data straight to UTF-8 JSON bytes, ObjectId and datetime included"""
+    if orjson is not None:
+        return orjson.dumps(data, default=_default)
+    return json.dumps(data, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def choose_encoding(accept_encoding):
+    """Pick the best content coding the client accepts, or None for identity"""
+    if not accept_encoding:
+        return None
+
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+    # Highest quality wins; max() keeps the first on ties, so br beats gzip only then
+    best = max(supported, key=lambda coding: accepted.get(coding, wildcard))
+    if accepted.get(best, wildcard) > 0:
+        return best
+    return None
+
+
+def _negotiate(body, accept_encoding):
+    if len(body) < MIN_COMPRESS_SIZE:
+        return None
+    return choose_encoding(accept_encoding)
+
+
+def _compress_as(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
+
+
+def _headers(encoding):
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return headers
+
+
+def compress(body, accept_encoding):
+    """Compress body for the client if it is large enough; returns (body, encoding)"""
+    encoding = _negotiate(body, accept_encoding)
+    return _compress_as(body, encoding), encoding
+
+
+def encode_json(data, accept_encoding=None):
+    """Serialize and negotiate compression; returns (body, headers) for either app"""
+    body, encoding = compress(dumps(data), accept_encoding)
+    return body, _headers(encoding)
+
+
+class ResponseCache:
+    """Encoded (and compressed) bodies for responses whose content is fully described by a key.
+
+    Compressing a multi-megabyte catalogue costs several times more than encoding
+    it, so endpoints whose data only changes with e.g. the catalogue version keep
+    the encoded body per coding and skip both steps while the key is unchanged.
+    Only the latest key per name is kept.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def encode(self, name, key, build, accept_encoding=None):
+        """(body, headers) for name at key; build() is only called when key changes"""
+        with self._lock:
+            entry = self._entries.get(name)
+        if entry is None or entry[0] != key:
+            entry = (key, {None: dumps(build())})
+            with self._lock:
+                self._entries[name] = entry
+
+        bodies = entry[1]
+        encoding = _negotiate(bodies[None], accept_encoding)
+        body = bodies.get(encoding)
+        if body is None:
+            body = _compress_as(bodies[None], encoding)
+            bodies[encoding] = body
+        return body, _headers(encoding)
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,107 @@
+import pytest
+from bson import ObjectId
+
+from catalogue_snapshot import BookRecord, CatalogueSnapshot, parse_projection
+from conftest import InMemoryInventory
+
+
+def book(name, **fields):
+    return {"_id": ObjectId(), "name": name, "author": "Author", "genre": "Fiction", **fields}
+
+
+def loaded(*docs):
+    snapshot = CatalogueSnapshot(InMemoryInventory(docs))
+    snapshot.reload()
+    return snapshot
+
+
+def change(operation, doc):
+    event = {"operationType": operation, "documentKey": {"_id": doc["_id"]}}
+    if operation != "delete":
+        event["fullDocument"] = doc
+    return event
+
+
+@pytest.mark.parametrize("projection, expected", [
+    (None, (None, ())),
+    ({}, (None, ())),
+    ({"_id": 1}, (["_id"], ())),
+    ({"_id": 0}, (None, {"_id"})),
+    ({"name": 1}, (["_id", "name"], ())),
+    ({"_id": 0, "name": 1}, (["name"], ())),
+    ({"description": 0}, (None, {"description"})),
+])
+def test_parse_projection(projection, expected):
+    assert parse_projection(projection) == expected
+
+
+def test_to_dict_omits_missing_fields_and_keeps_extras():
+    doc = book("Dune", shelf="B2")
+    record = BookRecord(doc)
+    assert record.to_dict() == doc
+    assert record.to_dict(*parse_projection({"_id": 0, "image": 1, "shelf": 1})) == {"shelf": "B2"}
+
+
+def test_reload_keeps_version_when_nothing_changed():
+    doc = book("Dune")
+    snapshot = loaded(doc)
+    assert snapshot.version == 1
+
+    snapshot.reload()
+    assert snapshot.version == 1
+
+    snapshot.collection.docs[0] = dict(doc, rating=5)
+    snapshot.reload()
+    assert snapshot.version == 2
+    assert snapshot.by_name("Dune").rating == 5
+
+
+def test_apply_change_versions():
+    doc = book("Dune")
+    snapshot = loaded(doc)
+
+    assert snapshot.apply_change(change("update", dict(doc)))
+    assert snapshot.version == 1
+
+    renamed = dict(doc, name="Dune Messiah")
+    snapshot.apply_change(change("replace", renamed))
+    assert snapshot.version == 2
+    assert snapshot.by_name("Dune") is None
+    assert snapshot.by_name("Dune Messiah").name == "Dune Messiah"
+
+    snapshot.apply_change(change("delete", renamed))
+    assert snapshot.version == 3
+    assert snapshot.by_id(doc["_id"]) is None
+    assert snapshot.records() == ()
+
+    # Deleting it again is a no-op; a drop asks for a full reload
+    snapshot.apply_change(change("delete", renamed))
+    assert snapshot.version == 3
+    assert not snapshot.apply_change({"operationType": "drop"})
+
+
+def test_duplicate_names_survive_deleting_one():
+    first, second = book("Dune", rating=4), book("Dune", rating=5)
+    snapshot = loaded(first, second)
+    assert snapshot.by_name("Dune")._id == first["_id"]
+
+    snapshot.apply_change(change("delete", first))
+    assert snapshot.by_name("Dune")._id == second["_id"]
+
+    snapshot.apply_change(change("insert", first))
+    snapshot.apply_change(change("replace", dict(second, name="Children of Dune")))
+    assert snapshot.by_name("Dune")._id == first["_id"]
+    assert snapshot.by_name("Children of Dune")._id == second["_id"]
+
+
+def test_documents_are_cached_per_version_and_projection():
+    doc = book("Dune")
+    snapshot = loaded(doc)
+
+    names = snapshot.documents({"_id": 0, "name": 1})
+    assert names == [{"name": "Dune"}]
+    assert snapshot.documents({"name": 1, "_id": 0}) is names
+    assert snapshot.documents() is not names
+
+    snapshot.apply_change(change("update", dict(doc, name="Dune Messiah")))
+    assert snapshot.documents({"_id": 0, "name": 1}) == [{"name": "Dune Messiah"}]
@@ -0,0 +1,63 @@
+from bson import ObjectId
+
+import library_service
+
+
+def test_find_books_by_ids_falls_back_to_one_query_for_misses(catalogue_db):
+    known, new_a, new_b = ObjectId(), ObjectId(), ObjectId()
+    db = catalogue_db([{"_id": known, "name": "Known"}])
+    # Inserted after the snapshot loaded
+    db.inventory.docs += [{"_id": new_a, "name": "New A"}, {"_id": new_b, "name": "New B"}]
+
+    books = library_service.find_books_by_ids(db, [str(known), str(new_a), str(new_b), str(ObjectId())], {"name": 1})
+
+    assert books == {
+        str(known): {"_id": known, "name": "Known"},
+        str(new_a): {"_id": new_a, "name": "New A"},
+        str(new_b): {"_id": new_b, "name": "New B"},
+    }
+    assert len(db.inventory.queries) == 1
+
+
+def test_find_book_and_names_fall_back_to_db(catalogue_db):
+    db = catalogue_db([{"_id": ObjectId(), "name": "Known", "author": "A"}])
+    db.inventory.docs.append({"_id": ObjectId(), "name": "New", "author": "B"})
+
+    assert library_service.find_book(db, "New", {"_id": 0})["author"] == "B"
+    assert library_service.find_book(db, "Nowhere") is None
+    books = library_service.find_books_by_names(db, ["Known", "New", "Nowhere"], {"_id": 0, "author": 1})
+    assert books == {"Known": {"author": "A"}, "New": {"author": "B"}}
+
+
+class Loans:
+    def __init__(self, loans):
+        self.loans = loans
+
+    def find(self, query=None, projection=None):
+        return iter([{"book_name": name, "userID": user} for name, user in self.loans.items()])
+
+
+def test_books_with_status_leaves_shared_documents_alone(catalogue_db):
+    db = catalogue_db([{"_id": ObjectId(), "name": "Dune"}, {"_id": ObjectId(), "name": "Emma"}])
+    db.borrowed_books = Loans({"Dune": "reader"})
+
+    books = library_service.get_books_with_status(db, {"_id": 0}, include_borrower=True)
+
+    assert books == [{"name": "Dune", "borrowed": True, "borrowedBy": "reader"},
+                     {"name": "Emma", "borrowed": False}]
+    assert library_service.get_books(db, {"_id": 0}) == [{"name": "Dune"}, {"name": "Emma"}]
+
+
+def test_popular_books_tolerate_mixed_rating_types(catalogue_db):
+    db = catalogue_db([
+        {"_id": ObjectId(), "name": "Unrated", "author": "A"},
+        {"_id": ObjectId(), "name": "Text", "author": "A", "average_rating": "4.5"},
+        {"_id": ObjectId(), "name": "Low", "author": "A", "average_rating": 2},
+        {"_id": ObjectId(), "name": "High", "author": "A", "average_rating": 4.8},
+        {"_id": ObjectId(), "name": "Flag", "author": "A", "average_rating": True},
+    ])
+
+    names = [b["name"] for b in library_service.get_popular_books(db, 5)]
+    assert names[:2] == ["High", "Low"]
+    assert set(names[2:4]) == {"Text", "Flag"}
+    assert names[4] == "Unrated"
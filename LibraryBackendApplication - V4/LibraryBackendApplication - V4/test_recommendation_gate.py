@@ -0,0 +1,109 @@
+import threading
+import time
+
+import pytest
+
+import recommendation_gate
+from recommendation_gate import RecommendationGate
+
+POPULAR = [{"name": "Popular", "reason": "Popular"}]
+PERSONAL = [{"name": "Personal", "similarity": 0.9}]
+
+
+class FakeService:
+    """Stands in for library_service; recommendations block until release is set"""
+
+    def __init__(self, result=PERSONAL):
+        self.result = result
+        self.release = threading.Event()
+        self.release.set()
+        self.popular_calls = 0
+        self.popular_release = threading.Event()
+        self.popular_release.set()
+
+    def get_recommendations(self, db, username, n):
+        self.release.wait(5)
+        return self.result
+
+    def get_popular_fallback(self, db, n):
+        self.popular_calls += 1
+        self.popular_release.wait(5)
+        return list(POPULAR)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    fake = FakeService()
+    monkeypatch.setattr(recommendation_gate, "library_service", fake)
+    return fake
+
+
+def test_completed_once(service):
+    gate = RecommendationGate(max_workers=1, max_queue=0, deadline=1.0)
+    assert gate.recommend(None, "reader") == PERSONAL
+    assert gate.stats() == {"admitted": 1, "completed": 1, "shed": 0, "degraded": 0, "skipped": 0}
+
+
+def test_sheds_when_full(service):
+    gate = RecommendationGate(max_workers=1, max_queue=0, deadline=1.0)
+    service.release.clear()
+    first = threading.Thread(target=gate.recommend, args=(None, "reader"))
+    first.start()
+    while gate.stats()["admitted"] == 0:
+        time.sleep(0.001)
+
+    assert gate.recommend(None, "other") == POPULAR
+    service.release.set()
+    first.join()
+    stats = gate.stats()
+    assert stats["shed"] == 1
+    assert stats["completed"] == 1
+
+
+def test_degrades_past_deadline_without_counting_completed(service):
+    gate = RecommendationGate(max_workers=1, max_queue=0, deadline=0.05)
+    service.release.clear()
+    assert gate.recommend(None, "reader") == POPULAR
+    service.release.set()
+    gate._executor.shutdown(wait=True)
+
+    stats = gate.stats()
+    assert stats["degraded"] == 1
+    assert stats["completed"] == 0
+
+
+def test_skips_work_that_cannot_finish(service):
+    gate = RecommendationGate(deadline=0.5)
+    gate._avg_runtime = 10.0
+    assert gate.recommend(None, "reader") == POPULAR
+    stats = gate.stats()
+    assert stats["skipped"] == 1
+    assert stats["degraded"] == 1
+    assert gate._avg_runtime == pytest.approx(9.0)
+
+
+def test_empty_result_is_degraded(service):
+    service.result = []
+    gate = RecommendationGate(deadline=1.0)
+    assert gate.recommend(None, "reader") == POPULAR
+    stats = gate.stats()
+    assert stats["degraded"] == 1
+    assert stats["completed"] == 0
+
+
+def test_popular_refresh_is_single_flight(service):
+    gate = RecommendationGate(fallback_ttl=0.0)
+    gate.popular(None, 5)
+    assert service.popular_calls == 1
+
+    # The cache is now stale; while one caller refreshes, the others get the stale list
+    service.popular_release.clear()
+    refresher = threading.Thread(target=gate.popular, args=(None, 5))
+    refresher.start()
+    while service.popular_calls < 2:
+        time.sleep(0.001)
+
+    assert gate.popular(None, 5) == POPULAR
+    assert service.popular_calls == 2
+    service.popular_release.set()
+    refresher.join()
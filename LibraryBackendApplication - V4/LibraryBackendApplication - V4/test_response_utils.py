@@ -0,0 +1,54 @@
+import gzip
+
+import pytest
+
+import response_utils
+from response_utils import ResponseCache, choose_encoding, dumps, encode_json
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("", None),
+    ("gzip", "gzip"),
+    ("identity", None),
+    ("gzip;q=0", None),
+    ("br;q=0.5, gzip;q=0.9", "gzip"),
+    ("br, gzip", "br"),
+    ("*;q=0.3, gzip;q=0", "br"),
+    ("gzip;q=bogus, br;q=0", None),
+])
+def test_choose_encoding_honours_q_values(header, expected):
+    if response_utils.brotli is None and expected == "br":
+        pytest.skip("brotli not installed")
+    assert choose_encoding(header) == expected
+
+
+def test_dumps_encodes_numpy_scalars():
+    numpy = pytest.importorskip("numpy")
+    assert dumps({"a": numpy.float32(0.5), "b": numpy.int64(3)}) == b'{"a":0.5,"b":3}'
+
+
+def test_small_bodies_are_not_compressed():
+    body, headers = encode_json({"ok": True}, "gzip")
+    assert body == b'{"ok":true}'
+    assert "Content-Encoding" not in headers
+
+
+def test_response_cache_builds_once_per_key():
+    cache = ResponseCache()
+    calls = []
+    data = [{"name": f"Book {i}"} for i in range(200)]
+
+    def build():
+        calls.append(1)
+        return data
+
+    body, headers = cache.encode("books", 1, build, "gzip")
+    assert headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(body) == dumps(data)
+    assert cache.encode("books", 1, build, "gzip")[0] is body
+    assert cache.encode("books", 1, build, None)[0] == dumps(data)
+    assert len(calls) == 1
+
+    cache.encode("books", 2, build, "gzip")
+    assert len(calls) == 2